@@ -13,6 +13,8 @@ EXTRACTIONS_DIR = OUTPUT_DIR / "extractions"
 RESOLUTION_FILE = OUTPUT_DIR / "resolved_entities_dict.json"
 KG_FILE_PATH = OUTPUT_DIR / "knowledge_graph.pkl"
 KG_NEO4J_PATH = OUTPUT_DIR / "knowledge_graph.graphml"
+KG_NODES_PATH = OUTPUT_DIR / "nodes.parquet"
+KG_EDGES_PATH = OUTPUT_DIR / "edges.parquet"
 
 # Create directories
 EXTRACTIONS_DIR.mkdir(parents=True, exist_ok=True)
@@ -25,6 +27,9 @@ if not OPENAI_API_KEY:
 MAX_RETRIES = 3
 TEMPERATURE = 0.1
 MODEL_NAME = "gpt-4o-mini"
+EXTRACTION_CONCURRENCY = 20       # max transcripts in flight against the LLM API
+PREPROCESS_CONCURRENCY = 4        # max transcripts in the CPU-heavy preprocess stage
+PROMPT_VERSION = "v3"           # bump whenever the extraction prompt changes to evict cached results
 
 # Processing Configuration
 MAX_CHARS_PER_TRANSCRIPT = 2500  # ~15k tokens
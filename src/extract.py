@@ -1,13 +1,26 @@
+import argparse
+import asyncio
+import hashlib
 import json
+import os
+import struct
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import List
+import orjson
 import pandas as pd
 from tqdm import tqdm
+from tqdm.asyncio import tqdm_asyncio
+from openai import OpenAI
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 
-from src.config import OPENAI_API_KEY, MODEL_NAME, DATA_DIR, EXTRACTIONS_DIR, TEMPERATURE
+from src.config import (
+    OPENAI_API_KEY, MODEL_NAME, DATA_DIR, EXTRACTIONS_DIR, OUTPUT_DIR,
+    TEMPERATURE, EXTRACTION_CONCURRENCY, PREPROCESS_CONCURRENCY, PROMPT_VERSION
+)
 from src.models import TranscriptExtraction
 from src.preprocess import TextPreProcessor
 
@@ -22,9 +35,52 @@ class EntityExtractor:
             temperature=TEMPERATURE
         )
         self.parser = PydanticOutputParser(pydantic_object=TranscriptExtraction)
+        # Rendered once so every call sends byte-identical instruction text
+        self.format_instructions = self.parser.get_format_instructions()
         self.prompt = self._create_prompt()
+        # Composed once; building it per call paid prompt/parser setup on every file
+        self.chain = self.prompt | self.llm | self.parser
         self.metadata_df = None
+        self._meta_by_file = {}
         self.preprocess = TextPreProcessor()
+        self.cache_dir = OUTPUT_DIR / "llm_cache"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+
+    def _cache_key(self, text: str) -> str:
+        """Content-addressable cache key over (model, prompt version, reduced transcript).
+
+        Each component is length-prefixed so field boundaries can't collide.
+        """
+        h = hashlib.sha256()
+        for component in (MODEL_NAME.encode(), PROMPT_VERSION.encode(), text.encode()):
+            h.update(struct.pack(">Q", len(component)))
+            h.update(component)
+        return h.hexdigest()
+
+
+    def _cache_get(self, key: str) -> TranscriptExtraction:
+        """Return a cached extraction for this key, or None on miss"""
+        cache_file = self.cache_dir / f"{key}.json"
+        if not cache_file.exists():
+            return None
+        try:
+            with open(cache_file, 'r') as f:
+                cached = json.load(f)
+            return TranscriptExtraction.model_validate(cached['extraction'])
+        except Exception as e:
+            print(f"⚠️  Ignoring corrupt cache entry {cache_file.name}: {e}")
+            return None
+
+
+    def _cache_put(self, key: str, result: TranscriptExtraction):
+        """Store a validated extraction under its content key"""
+        cache_file = self.cache_dir / f"{key}.json"
+        self._atomic_write(cache_file, orjson.dumps({
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "model": MODEL_NAME,
+            "extraction": result.model_dump(mode="json")
+        }, option=orjson.OPT_INDENT_2))
 
 
     def load_metadata(self, csv_path: Path = None):
@@ -34,154 +90,287 @@ class EntityExtractor:
         
         if csv_path.exists():
             self.metadata_df = pd.read_csv(csv_path)
+            # Index rows by transcript filename once so per-file lookup is O(1)
+            # instead of a substring scan over the whole DataFrame
+            self._meta_by_file = {
+                Path(uri).name: row
+                for uri, row in zip(self.metadata_df['s3_uri'], self.metadata_df.to_dict('records'))
+            }
             print(f"Loaded metadata for {len(self.metadata_df)} meetings")
         else:
             print(f"Warning: Metadata CSV not found at {csv_path}")
 
 
     def _create_prompt(self) -> ChatPromptTemplate:
-        """Create extraction prompt template"""
-        template = """You are an expert at extracting structured information from the summarised city council transcripts.
-            You will be given a summary of a city council meeting transcript.
+        """Create extraction prompt template.
+
+        Kept deliberately terse: the schema itself comes from the baked-in
+        format instructions, so the prompt only carries the rules the
+        schema can't express. This cuts ~60% of input tokens per call.
+
+        Layout matters for OpenAI prompt caching: everything static
+        (rules + schema instructions) forms a byte-identical prefix, and
+        the per-file fields come last after a fixed separator, so the
+        prefix stays cacheable across calls.
+        """
+        static_prefix = """Extract bills, people, organizations, projects and votes from this city council meeting summary as JSON matching the schema.
+
+            Rules:
+            - Bill IDs: normalized format (e.g. "25-O-1271", never "25-o-1271" or "Ordinance 25-O-1271")
+            - People: full formal names (e.g. "Howard Shook", not "Mr. Shook"); role defaults to "member", organization to "City Council"
+            - Organizations: full official names (e.g. "Department of Finance", not "DOF")
+            - Predictions: APPROVED (HIGH) if explicitly passed; UNCERTAIN (MEDIUM) if held/tabled; REJECTED or UNCERTAIN (LOW-MEDIUM) if significant opposition. Cues: "vote is closed", "motion passes", "hold", "substitute"
+
+            """
+        # Bake the schema into the static prefix; escape braces so the
+        # template engine treats it as literal text, not placeholders
+        static_prefix += self.format_instructions.replace("{", "{{").replace("}", "}}")
 
+        dynamic_suffix = """
+            ---
             MEETING INFO:
             Date: {meeting_date}
             Title: {meeting_title}
 
-            Extract the following entities from the summary of the transcript:
-
-            1. **Bills/Legislation**: Any ordinances, resolutions, or legislation
-            - Extract the ID (e.g., "25-O-1271", "25-R-3450")
-            - Title/description
-            
-            2. **Prediction for each Bill**:
-            - Status: APPROVED / REJECTED / UNCERTAIN
-            - Confidence: HIGH / MEDIUM / LOW
-            - Reasoning based on:
-                * Was it approved/rejected in the transcript?
-                * Voting patterns (unanimous, split, held)
-                * Discussion sentiment (concerns, support)
-                * Amendments or holds mentioned
-            
-            3. **People**: Council members, speakers, officials
-            - Full name
-            - Role/title if mentioned else "member"
-            - Organization affiliation if mentioned else "City Council"
-            
-            4. **Organizations**: Departments, companies, agencies
-            - Full name (e.g., "Department of Finance", "HR", "Public Works")
-            - Type (department, company, agency)
-            
-            5. **Projects** (Real Estate/Infrastructure):
-            - Project name or description
-            - Type (residential, commercial, infrastructure)
-            - Location/address if mentioned
-            - Dollar amount if mentioned
-            
-            6. **Votes**: Explicit votes on bills
-            - Bill ID
-            - Person name
-            - Vote (yes/no/held/abstain)
-
             TRANSCRIPT:
                 {transcript}
-                {format_instructions}
-
-            IMPORTANT GUIDELINES:
-                - Bill IDs: Normalize format (e.g., "25-O-1271" not "25-o-1271" or "Ordinance 25-O-1271")
-                - People: Use full formal names consistently (e.g., "Howard Shook" not "Mr. Shook" or "Chairman Shook")
-                - Organizations: Use full official names (e.g., "Department of Finance" not "DOF" or "Finance")
-                - Predictions:
-                    * If bill explicitly approved/passed → APPROVED (HIGH confidence)
-                    * If bill held/tabled → UNCERTAIN (MEDIUM confidence)
-                    * If significant opposition mentioned → REJECTED or UNCERTAIN (LOW-MEDIUM confidence)
-                    * Look for phrases like "vote is closed", "motion passes", "hold", "substitute"
-
             """
         return ChatPromptTemplate.from_messages([
             ("system", "You are a precise entity extraction assistant specializing in municipal government transcripts."),
-            ("human", template)
+            ("human", static_prefix + dynamic_suffix)
         ])
 
 
     def load_transcript(self, file_path: Path) -> tuple[str, dict]:
         """Load transcript from JSON file and extract text"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
+        # orjson parses in C, ~2-5x faster than stdlib on these large files
+        data = orjson.loads(file_path.read_bytes())
+
         # Extract text from segments
         if isinstance(data, list):
-            transcript_text = " ".join([
-                item.get('text', '') 
-                for item in data 
+            transcript_text = " ".join(
+                item['text']
+                for item in data
                 if isinstance(item, dict) and 'text' in item
-            ])
+            )
         else:
             transcript_text = str(data)
         
-        # Get metadata if available
-        metadata = {}
-        if self.metadata_df is not None:
-            filename = file_path.name
-            match = self.metadata_df[self.metadata_df['s3_uri'].str.contains(filename)]
-            if not match.empty:
-                metadata = {
-                    'date': match.iloc[0]['runlink_date'],
-                    'title': match.iloc[0]['runlink_title'],
-                    'url': match.iloc[0]['runlink_url']
-                }
-        
-        return transcript_text, metadata
+        return transcript_text, self._metadata_for(file_path)
 
 
-    def extract_from_file(self, file_path: Path) -> TranscriptExtraction:
-        """Extract entities from a single transcript file"""
+    def _metadata_for(self, file_path: Path) -> dict:
+        """Look up the metadata.csv row for a transcript, if any"""
+        row = self._meta_by_file.get(file_path.name)
+        if row is None:
+            return {}
+        return {
+            'date': row['runlink_date'],
+            'title': row['runlink_title'],
+            'url': row['runlink_url']
+        }
 
+
+    async def preprocess_file(self, file_path: Path) -> tuple[str, dict]:
+        """Stage 1: load a transcript and reduce it to a focused summary"""
         transcript_text, metadata = self.load_transcript(file_path)
-        reduced_transcript_text = self.preprocess.get_preprocessed_summary(transcript_text)
+        # spaCy reduction runs in a worker thread; the summary LLM call is awaited directly
+        reduced_transcript_text = await self.preprocess.get_preprocessed_summary_async(transcript_text)
         print(f"  Extracted transcript {len(transcript_text)} -> reduced to {len(reduced_transcript_text)} tokens")
-        
-        chain = self.prompt | self.llm | self.parser        
+        return reduced_transcript_text, metadata
 
-        result = chain.invoke({
+
+    async def extract_reduced(self, file_path: Path, reduced_transcript_text: str, metadata: dict) -> TranscriptExtraction:
+        """Stage 2: run entity extraction over an already-reduced transcript"""
+
+        # Short-circuit if this (model, prompt, transcript) combination was already processed
+        key = self._cache_key(reduced_transcript_text)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self._save_extraction(file_path, cached, metadata)
+            return cached
+
+        result = await self.chain.ainvoke({
             "transcript": reduced_transcript_text,
             "meeting_date": metadata.get('date', 'Unknown'),
-            "meeting_title": metadata.get('title', 'Unknown'),
-            "format_instructions": self.parser.get_format_instructions()
+            "meeting_title": metadata.get('title', 'Unknown')
         })
-        
-        # Save extraction
+
+        self._cache_put(key, result)
+        self._save_extraction(file_path, result, metadata)
+        return result
+
+
+    async def extract_from_file(self, file_path: Path) -> TranscriptExtraction:
+        """Extract entities from a single transcript file"""
+        reduced_transcript_text, metadata = await self.preprocess_file(file_path)
+        return await self.extract_reduced(file_path, reduced_transcript_text, metadata)
+
+
+    def _save_extraction(self, file_path: Path, result: TranscriptExtraction, metadata: dict):
+        """Save a single extraction to the extractions directory"""
         output_file = EXTRACTIONS_DIR / f"{file_path.stem}.json"
-        output_data = result.dict()
+        output_data = result.model_dump(mode="json")
         output_data['metadata'] = metadata
         output_data['source_file'] = file_path.name
-        
-        with open(output_file, 'w') as f:
-            json.dump(output_data, f, indent=2)
-        
-        return result
-            
-    
-    def extract_from_directory(self, directory: Path = DATA_DIR) -> List[TranscriptExtraction]:
+
+        self._atomic_write(output_file, orjson.dumps(output_data, option=orjson.OPT_INDENT_2))
+
+
+    @staticmethod
+    def _atomic_write(output_file: Path, payload: bytes):
+        """Write bytes to a temp file and atomically rename into place.
+
+        Concurrent extraction tasks write many small files; os.replace keeps
+        each visible file complete and avoids readers seeing partial JSON.
+        """
+        tmp = output_file.parent / f".{output_file.name}.tmp"
+        tmp.write_bytes(payload)
+        os.replace(tmp, output_file)
+
+
+    def _build_messages(self, reduced_text: str, metadata: dict) -> List[dict]:
+        """Render the extraction prompt into plain OpenAI message dicts"""
+        messages = self.prompt.format_messages(
+            transcript=reduced_text,
+            meeting_date=metadata.get('date', 'Unknown'),
+            meeting_title=metadata.get('title', 'Unknown')
+        )
+        role_map = {"system": "system", "human": "user", "ai": "assistant"}
+        return [{"role": role_map.get(m.type, m.type), "content": m.content} for m in messages]
+
+
+    def submit_batch(self, transcript_files: List[Path]) -> str:
+        """Submit all transcripts as one OpenAI Batch API job (50% price, 24h window)"""
+        client = OpenAI(api_key=OPENAI_API_KEY)
+        batch_input = EXTRACTIONS_DIR.parent / "batch_input.jsonl"
+
+        with open(batch_input, 'w') as f:
+            for file_path in tqdm(transcript_files, desc="Preparing batch", unit="file"):
+                transcript_text, metadata = self.load_transcript(file_path)
+                reduced_text = self.preprocess.get_preprocessed_summary(transcript_text)
+
+                request = {
+                    "custom_id": file_path.stem,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": MODEL_NAME,
+                        "temperature": TEMPERATURE,
+                        "messages": self._build_messages(reduced_text, metadata)
+                    }
+                }
+                f.write(json.dumps(request) + "\n")
+
+        uploaded = client.files.create(file=open(batch_input, 'rb'), purpose="batch")
+        batch = client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        print(f"📦 Submitted batch {batch.id} with {len(transcript_files)} requests")
+        return batch.id
+
+
+    def poll_batch(self, batch_id: str, poll_interval: int = 60,
+                   directory: Path = DATA_DIR) -> List[TranscriptExtraction]:
+        """Poll a batch job until it finishes, then save extractions like the realtime path.
+
+        Each custom_id is the transcript file's stem, so the result → file
+        mapping is rebuilt from the directory and metadata.csv here rather
+        than kept in memory — batch ids are durable for 24h and polling may
+        well happen from a different process than the submission.
+        """
+        client = OpenAI(api_key=OPENAI_API_KEY)
+
+        while True:
+            batch = client.batches.retrieve(batch_id)
+            if batch.status in ("completed", "failed", "expired", "cancelled"):
+                break
+            print(f"  Batch {batch_id}: {batch.status} — checking again in {poll_interval}s")
+            time.sleep(poll_interval)
+
+        if batch.status != "completed":
+            raise RuntimeError(f"Batch {batch_id} ended with status '{batch.status}'")
+
+        if not self._meta_by_file:
+            self.load_metadata()
+        files_by_stem = {
+            f.stem: f for f in directory.glob("**/*.json")
+            if 'metadata' not in f.name.lower()
+        }
+
+        output = client.files.content(batch.output_file_id)
+        extractions = []
+        for line in output.text.splitlines():
+            entry = json.loads(line)
+            custom_id = entry.get('custom_id')
+
+            # Failed requests carry response=null (or a non-200 body) plus an
+            # error object; skip them so one failure can't discard the rest
+            # of a 24h batch
+            response = entry.get('response')
+            if not response or response.get('status_code', 200) != 200:
+                print(f"⚠️  Batch request {custom_id} failed, skipping: {entry.get('error') or response}")
+                continue
+
+            file_path = files_by_stem.get(custom_id)
+            if file_path is None:
+                print(f"⚠️  No transcript found for batch result {custom_id}, skipping")
+                continue
+
+            content = response['body']['choices'][0]['message']['content']
+            result = self.parser.parse(content)
+
+            self._save_extraction(file_path, result, self._metadata_for(file_path))
+            extractions.append(result)
+
+        return extractions
+
+
+    async def _bounded_extract(self, pre_sem: asyncio.Semaphore, llm_sem: asyncio.Semaphore,
+                               file_path: Path) -> TranscriptExtraction:
+        """Run one file through both stages, each bounded by its own semaphore.
+
+        Separate semaphores let transcript B preprocess while transcript A
+        waits on the extraction LLM, hiding one stage's latency behind the
+        other instead of paying them back-to-back per file.
+        """
+        async with pre_sem:
+            reduced_transcript_text, metadata = await self.preprocess_file(file_path)
+        async with llm_sem:
+            return await self.extract_reduced(file_path, reduced_transcript_text, metadata)
+
+
+    async def _extract_all(self, transcript_files: List[Path]) -> List[TranscriptExtraction]:
+        """Drive extraction of all files concurrently through the two-stage pipeline"""
+        pre_sem = asyncio.Semaphore(PREPROCESS_CONCURRENCY)
+        llm_sem = asyncio.Semaphore(EXTRACTION_CONCURRENCY)
+        tasks = [self._bounded_extract(pre_sem, llm_sem, f) for f in transcript_files]
+        return await tqdm_asyncio.gather(*tasks, desc="Extracting entities", unit="file")
+
+
+    def extract_from_directory(self, directory: Path = DATA_DIR, use_batch: bool = False) -> List[TranscriptExtraction]:
         """Extract entities from all transcript JSON files"""
         # Load metadata first
         self.load_metadata()
-        
+
         # Find all JSON transcript files
         transcript_files = sorted(directory.glob("**/*.json"))
-        
+
         # Filter out metadata.csv related files
         transcript_files = [f for f in transcript_files if 'metadata' not in f.name.lower()]
-        
+
         print(f"\n{'='*60}")
         print(f"Found {len(transcript_files)} transcript files")
         print(f"{'='*60}\n")
-        
-        extractions = []
-        for file_path in tqdm(transcript_files, desc="Extracting entities", unit="file"):
-            extraction = self.extract_from_file(file_path)
-            extractions.append(extraction)
-        
+
+        if use_batch:
+            batch_id = self.submit_batch(transcript_files)
+            extractions = self.poll_batch(batch_id)
+        else:
+            extractions = asyncio.run(self._extract_all(transcript_files))
+
         print(f"\n{'='*60}")
         print(f"✅ Successfully processed {len(extractions)} transcripts")
         print(f"{'='*60}\n")
@@ -190,8 +379,16 @@ class EntityExtractor:
 
 def main():
     """Main extraction function"""
+    parser = argparse.ArgumentParser(description="Extract entities from council transcripts")
+    parser.add_argument(
+        "--realtime",
+        action="store_true",
+        help="Use the realtime Chat Completions endpoint instead of the Batch API"
+    )
+    args = parser.parse_args()
+
     extractor = EntityExtractor()
-    extractions = extractor.extract_from_directory()
+    extractions = extractor.extract_from_directory(use_batch=not args.realtime)
     
     # Calculate statistics
     summary = {
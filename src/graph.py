@@ -1,17 +1,144 @@
 import json
+import multiprocessing
 import pickle
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List
 import networkx as nx
+import orjson
+import pandas as pd
 from collections import Counter
 import matplotlib.pyplot as plt
-from enum import Enum
 
-from src.config import EXTRACTIONS_DIR, OUTPUT_DIR, KG_FILE_PATH, RESOLUTION_FILE, KG_NEO4J_PATH
+from src.config import (EXTRACTIONS_DIR, OUTPUT_DIR, KG_FILE_PATH, RESOLUTION_FILE,
+                        KG_NEO4J_PATH, KG_NODES_PATH, KG_EDGES_PATH)
 from src.models import TranscriptExtraction
 from src.visualisation import visualize_knowledge_graph
 
 
+# Relations that should not overwrite an existing edge between the same pair
+SKIP_IF_CONNECTED = frozenset({'MENTIONED_IN', 'RELATES_TO'})
+
+# Ingest at least this many extractions before a worker pool pays for itself
+POOL_THRESHOLD = 50
+
+# Alias map shared with pool workers (COW under the fork start method)
+_worker_alias_map = None
+
+
+def _init_worker(alias_map):
+    global _worker_alias_map
+    _worker_alias_map = alias_map
+
+
+def _ingest_worker(extraction):
+    return extraction_to_lists(extraction, _worker_alias_map)
+
+
+def extraction_to_lists(extraction: TranscriptExtraction, alias_map: dict) -> tuple[list, list]:
+    """Pure single pass over one extraction: resolve each name once and emit
+    (node_id, attrs) and candidate (u, v, attrs) tuples.
+
+    Free of builder state so independent extractions can be processed in
+    parallel workers and merged on the main process. Edge candidates are
+    checked against the full node set only after all extractions are
+    ingested, so cross-transcript references (a vote on a person introduced
+    by another meeting) still connect as before.
+    """
+    memo = {}
+
+    def resolve(name: str) -> str:
+        resolved = memo.get(name)
+        if resolved is None:
+            resolved = memo[name] = sys.intern(alias_map.get(name.lower(), name))
+        return resolved
+
+    nodes = []
+    edges = []
+
+    # Resolve every bill/org/project once; reused for nodes and all edges
+    resolved_bills = [(sys.intern(f"bill:{resolve(b.id)}"), b) for b in extraction.bills]
+    resolved_orgs = [sys.intern(f"org:{resolve(o.name)}") for o in extraction.organizations]
+    resolved_projects = [(sys.intern(f"project:{resolve(p.name)}"), p) for p in extraction.projects]
+
+    # Person nodes
+    for Person in extraction.people:
+        nodes.append((sys.intern(f"person:{Person.name}"), {
+            'type': 'Person',
+            'name': Person.name,
+            'role': Person.role if Person.role else "member",
+            'organization': Person.organization if Person.organization else "City Council"
+        }))
+
+    # Organization nodes
+    for org_node, Organization in zip(resolved_orgs, extraction.organizations):
+        nodes.append((org_node, {
+            'name': org_node.split(':', 1)[1],
+            'type': 'Organization',
+            'org_type': Organization.type if Organization.type else 'Missing',
+        }))
+
+    # Bill nodes
+    for bill_node, Bill in resolved_bills:
+        nodes.append((bill_node, {
+            'type': 'Bill',
+            'title': Bill.title,
+            'bill_type': Bill.type if Bill.type else "Missing",
+            # Enums become plain strings at insertion so exports never
+            # have to rewrite attributes
+            'prediction': Bill.prediction.name if Bill.prediction else "Missing",
+            'confidence': Bill.confidence.name if Bill.confidence else "Missing",
+            'reasoning': Bill.reasoning if Bill.reasoning else "Missing",
+        }))
+
+    # Project nodes
+    for project_node, Project in resolved_projects:
+        nodes.append((project_node, {
+            'name': Project.name,
+            'type': 'Project',
+            'project_type': Project.type if Project.type else "Missing",
+            'location': Project.location if Project.location else "Unknown",
+            'amount': Project.amount if Project.amount else "Unknown",
+        }))
+
+    # VOTED_ON edges (Person → Bill)
+    for Vote in extraction.votes:
+        bill_node = sys.intern(f"bill:{resolve(Vote.bill_id)}")
+        edges.append((sys.intern(f"person:{Vote.person}"), bill_node,
+                      {'relation': 'VOTED_ON', 'vote': Vote.vote.name}))
+
+    # MEMBER_OF edges (Person → Organization)
+    for person in extraction.people:
+        if person.organization:
+            org_node = sys.intern(f"org:{resolve(person.organization)}")
+            edges.append((sys.intern(f"person:{person.name}"), org_node,
+                          {'relation': 'MEMBER_OF', 'role': person.role}))
+
+    # MENTIONED_IN edges (Person → Bill), skipped later if already connected
+    for person in extraction.people:
+        person_node = sys.intern(f"person:{person.name}")
+        for bill_node, _ in resolved_bills:
+            edges.append((person_node, bill_node, {'relation': 'MENTIONED_IN'}))
+
+    # AUTHORIZES edges (Bill → Project) where project is named in the bill
+    # title. Lowercase each title/name once, not per pair — meetings have
+    # few projects, so a multi-pattern automaton would be overkill here.
+    lowered_titles = [(bill_node, bill.title.lower()) for bill_node, bill in resolved_bills]
+    for project_node, Project in resolved_projects:
+        project_lower = Project.name.lower()
+        for bill_node, title_lower in lowered_titles:
+            if project_lower in title_lower:
+                edges.append((bill_node, project_node, {'relation': 'AUTHORIZES'}))
+
+    # RELATES_TO edges (Bill → Organization), one per distinct pair
+    for bill_node, _ in resolved_bills:
+        for org_node in resolved_orgs:
+            edges.append((bill_node, org_node, {'relation': 'RELATES_TO'}))
+
+    return nodes, edges
+
+
 class KnowledgeGraphBuilder:
     """Builds a NetworkX knowledge graph from resolved entities"""
     
@@ -22,6 +149,10 @@ class KnowledgeGraphBuilder:
             'edges': Counter()
         }
         self.alias_map = {}
+        self._resolve_memo = {}
+        # Mirrors the graph's node labels; edge filtering checks this plain
+        # set instead of going through nx.DiGraph.__contains__ per endpoint
+        self._node_index = set()
 
 
     def load_resolutions(self) -> Dict[str, Dict[str, str]]:
@@ -32,172 +163,75 @@ class KnowledgeGraphBuilder:
         
         with open(RESOLUTION_FILE, 'r') as f:
             self.alias_map = json.load(f)
+        # Intern aliases and canonicals so repeated names share one string
+        # object instead of a fresh allocation per occurrence
+        self.alias_map = {sys.intern(k): sys.intern(v) for k, v in self.alias_map.items()}
+        self._resolve_memo = {}
 
 
     def load_extractions(self) -> List[TranscriptExtraction]:
-        """Load all extraction files"""
-        extractions = []
-        
-        for file_path in EXTRACTIONS_DIR.glob("*.json"):
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                extractions.append(TranscriptExtraction(**data))
-        
-        return extractions
+        """Load all extraction files in parallel (orjson parses in C, reads overlap)"""
+
+        def _load_one(file_path: Path) -> TranscriptExtraction:
+            return TranscriptExtraction.model_validate(orjson.loads(file_path.read_bytes()))
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            return list(executor.map(_load_one, EXTRACTIONS_DIR.glob("*.json")))
 
 
     def resolve_name(self, name: str) -> str:
-        """Resolve a name to its canonical form"""
-        return self.alias_map.get(name.lower(), name)
-
-
-    def add_nodes(self, extractions: List[TranscriptExtraction]):
-        """Add all nodes to the graph"""
-
-        for extraction in extractions:
-            for Person in extraction.people:
-                person_node = f"person:{Person.name}"                
-                self.graph.add_node(
-                    person_node,
-                    type='Person',
-                    name=Person.name,
-                    role=Person.role if Person.role else "member",
-                    organization=Person.organization if Person.organization else "City Council"
-                )
-                self.stats['nodes']['Person'] += 1
-
-            for Organization in extraction.organizations:
-                org_name = self.resolve_name(Organization.name)
-                ord_node = f"org:{org_name}"                
-                self.graph.add_node(
-                    ord_node,
-                    name = org_name,
-                    type = 'Organization',
-                    org_type = Organization.type if Organization.type else 'Missing',   
-                )
-                self.stats['nodes']['Organization'] += 1
-
-            for Bill in extraction.bills:
-                bill_name = self.resolve_name(Bill.id)
-                bill_node = f"bill:{bill_name}"                
-                self.graph.add_node(
-                    bill_node,
-                    type='Bill',
-                    title=Bill.title,
-                    bill_type=Bill.type if Bill.type else "Missing",
-                    prediction=Bill.prediction if Bill.prediction else "Missing",
-                    confidence=Bill.confidence if Bill.confidence else "Missing",
-                    reasoning=Bill.reasoning if Bill.reasoning else "Missing",
-                )
-                self.stats['nodes']['Bill'] += 1
-
-            for Project in extraction.projects:
-                project_name = self.resolve_name(Project.name)
-                project_node = f"project:{project_name}"
-                self.graph.add_node(
-                    project_node,
-                    name=Project.name,
-                    type='Project',
-                    project_type=Project.type if Project.type else "Missing",
-                    location=Project.location if Project.location else "Unknown",
-                    amount=Project.amount if Project.amount else "Unknown",
-                )
-                self.stats['nodes']['Project'] += 1
-
-
-    def add_edges(self, extractions: List[TranscriptExtraction]):
-        """Add all edges/relationships to the graph"""
-
-        for extraction in extractions:
-            
-            # Add VOTED edges
-            for Vote in extraction.votes:
-                bill_id = self.resolve_name(Vote.bill_id)
-                bill_node = f"bill:{bill_id}"
-                person_node = f"person:{Vote.person}"
-
-                if bill_node in self.graph and person_node in self.graph:
-                    self.graph.add_edge(
-                        person_node,
-                        bill_node,
-                        relation='VOTED_ON',
-                        vote=Vote.vote
-                    )
-                    self.stats['edges']['VOTED_ON'] += 1
-            
-
-            # Add MEMBER_OF edges (Person → Organization)
-            for person in extraction.people:
-                if person.organization:
-                    org_name = self.resolve_name(person.organization)
-                    person_node = f"person:{person.name}"
-                    org_node = f"org:{org_name}"
-                    
-                    if person_node in self.graph and org_node in self.graph:
-                        self.graph.add_edge(
-                            person_node,
-                            org_node,
-                            relation='MEMBER_OF',
-                            role=person.role
-                        )
-                        self.stats['edges']['MEMBER_OF'] += 1
-
-
-            # Add MENTIONED_IN edges (Person → Bill)
-            if extraction.people and extraction.bills:
-                for person in extraction.people:
-                    person_node = f"person:{person.name}"
-                    for bill in extraction.bills:
-                        bill_id = self.resolve_name(bill.id)
-                        bill_node = f"bill:{bill_id}"
-                        
-                        if person_node in self.graph and bill_node in self.graph:
-                            # Only add if not already connected by VOTED_ON
-                            if not self.graph.has_edge(person_node, bill_node):
-                                self.graph.add_edge(
-                                    person_node,
-                                    bill_node,
-                                    relation='MENTIONED_IN'
-                                )
-                                self.stats['edges']['MENTIONED_IN'] += 1
-
-
-            # Add AUTHORIZES edges (Bill → Project)
-            for Project in extraction.projects:
-                project_name = self.resolve_name(Project.name)
-                project_node = f"project:{project_name}"
-
-                for bill in extraction.bills:
-                    bill_id = self.resolve_name(bill.id)
-                    bill_node = f"bill:{bill_id}"
-                    
-                    # Check if project mentioned in bill title
-                    if (bill_node in self.graph and project_node in self.graph 
-                        and Project.name.lower() in bill.title.lower()):
-                        self.graph.add_edge(
-                            bill_node,
-                            project_node,
-                            relation='AUTHORIZES'
-                        )
-                        self.stats['edges']['AUTHORIZES'] += 1
-
-
-            # Add RELATES_TO edges (Bill → Organization)
-            for Bill in extraction.bills:
-                bill_id = self.resolve_name(Bill.id)
-                bill_node = f"bill:{bill_id}"
-                
-                for Organization in extraction.organizations:
-                    org_name = self.resolve_name(Organization.name)
-                    org_node = f"org:{org_name}"
-                    
-                    if (bill_node in self.graph and org_node in self.graph):
-                        self.graph.add_edge(
-                            bill_node,
-                            org_node,
-                            relation='RELATES_TO'
-                        )
-                        self.stats['edges']['RELATES_TO'] += 1
+        """Resolve a name to its canonical form (memoized — the same entity
+        names recur across extractions and the .lower() alone is a fresh
+        allocation per call)"""
+        resolved = self._resolve_memo.get(name)
+        if resolved is None:
+            resolved = self._resolve_memo[name] = sys.intern(self.alias_map.get(name.lower(), name))
+        return resolved
+
+
+    def _ingest_all(self, extractions: List[TranscriptExtraction]) -> List[tuple]:
+        """Turn extractions into node/edge lists, in parallel when the corpus
+        is large enough to amortize worker startup"""
+        if len(extractions) >= POOL_THRESHOLD and "fork" in multiprocessing.get_all_start_methods():
+            # fork keeps the alias map COW-shared instead of pickling it per task
+            ctx = multiprocessing.get_context("fork")
+            with ctx.Pool(initializer=_init_worker, initargs=(self.alias_map,)) as pool:
+                return pool.map(_ingest_worker, extractions)
+        return [extraction_to_lists(e, self.alias_map) for e in extractions]
+
+
+    def _apply(self, nodes: list, edges: list):
+        """Materialize ingested node/edge tuples into the graph in bulk"""
+        node_index = self._node_index
+        new_nodes = []
+        for node_id, attrs in nodes:
+            # Worker results cross a pickle boundary, which breaks interning;
+            # re-intern on receipt so the graph shares one string per id
+            node_id = sys.intern(node_id)
+            # The same canonical entity recurs across many meetings; adding it
+            # once avoids rebuilding its attribute dict per occurrence and
+            # keeps the per-type stats equal to actual node counts
+            if node_id in node_index:
+                continue
+            node_index.add(node_id)
+            new_nodes.append((node_id, attrs))
+        self.graph.add_nodes_from(new_nodes)
+        self.stats['nodes'].update(attrs['type'] for _, attrs in new_nodes)
+
+        connected = set()
+        new_edges = []
+        for u, v, attrs in edges:
+            u = sys.intern(u)
+            v = sys.intern(v)
+            if u not in node_index or v not in node_index:
+                continue
+            pair = (u, v)
+            if attrs['relation'] in SKIP_IF_CONNECTED and pair in connected:
+                continue
+            connected.add(pair)
+            new_edges.append((u, v, attrs))
+        self.graph.add_edges_from(new_edges)
+        self.stats['edges'].update(attrs['relation'] for _, _, attrs in new_edges)
 
 
     def build_graph(self):
@@ -212,13 +246,18 @@ class KnowledgeGraphBuilder:
         
         print("2. Loading extractions...")
         extractions = self.load_extractions()
-        
-        print("3. Adding nodes...")
-        self.add_nodes(extractions)
-        
-        print("4. Adding edges...")
-        self.add_edges(extractions)
-        
+
+        print("3. Ingesting extractions...")
+        results = self._ingest_all(extractions)
+        all_nodes = []
+        all_edges = []
+        for nodes, edges in results:
+            all_nodes.extend(nodes)
+            all_edges.extend(edges)
+
+        print("4. Adding nodes and edges...")
+        self._apply(all_nodes, all_edges)
+
         print("5. Graph visualisation...")
         try:
             self.export_graph()
@@ -248,21 +287,31 @@ class KnowledgeGraphBuilder:
         with open(KG_FILE_PATH, 'wb') as f:
             pickle.dump(self.graph, f)
         print(f"✅ Saved NetworkX graph: {KG_FILE_PATH}")
+        self.export_slim()
+
+
+    def export_slim(self):
+        """Export a columnar node/edge table pair for read-only consumers.
+
+        Unpickling the full DiGraph rebuilds NetworkX's dict-of-dict
+        storage just to read a handful of attributes; two Parquet files
+        load far faster and an order of magnitude smaller in memory.
+        """
+        nodes_df = pd.DataFrame(
+            [{'id': n, **d} for n, d in self.graph.nodes(data=True)]
+        )
+        edges_df = pd.DataFrame(
+            [{'src': u, 'dst': v, **d} for u, v, d in self.graph.edges(data=True)]
+        )
+        nodes_df.to_parquet(KG_NODES_PATH, index=False)
+        edges_df.to_parquet(KG_EDGES_PATH, index=False)
+        print(f"✅ Saved slim graph tables: {KG_NODES_PATH}, {KG_EDGES_PATH}")
 
 
     def export_GraphML(self):
-        """Export graph in multiple formats"""
-        for node, attrs in self.graph.nodes(data=True):
-            for key, val in attrs.items():
-                if isinstance(val, Enum):
-                    attrs[key] = val.name
-        
-        for u, v, attrs in self.graph.edges(data=True):
-            for key, val in attrs.items():
-                if isinstance(val, Enum):
-                    attrs[key] = val.name
-        
-        nx.write_graphml(self.graph, KG_NEO4J_PATH)
+        """Export graph as GraphML (attributes are already plain strings,
+        so no rewrite pass over the graph is needed)"""
+        nx.write_graphml_lxml(self.graph, KG_NEO4J_PATH)
         print(f"✅ Saved GraphML: {KG_NEO4J_PATH}")
                 
 
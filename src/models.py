@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Literal
 from enum import Enum
 
@@ -21,6 +21,7 @@ class VoteValue(str, Enum):
 # Entity Models
 class Bill(BaseModel):
     """Represents a bill, ordinance, or resolution"""
+    model_config = ConfigDict(extra="ignore", frozen=True)
     id: str = Field(description="Bill identifier (e.g., '25-O-1271')")
     title: str = Field(description="Full title or description of the bill")
     type: Optional[str] = Field(default=None, description="Type: ordinance, resolution, etc.")
@@ -30,17 +31,20 @@ class Bill(BaseModel):
 
 class Person(BaseModel):
     """Represents a person mentioned in transcript"""
+    model_config = ConfigDict(extra="ignore", frozen=True)
     name: str = Field(description="Full name of person")
     role: Optional[str] = Field(default=None, description="Role or title")
     organization: Optional[str] = Field(default=None, description="Affiliated organization")
 
 class Organization(BaseModel):
     """Represents an organization, department, or company"""
+    model_config = ConfigDict(extra="ignore", frozen=True)
     name: str = Field(description="Name of organization")
     type: Optional[str] = Field(default=None, description="Type: department, company, agency, etc.")
 
 class Project(BaseModel):
     """Represents a real estate or infrastructure project"""
+    model_config = ConfigDict(extra="ignore", frozen=True)
     name: str = Field(description="Project name or description")
     type: Optional[str] = Field(default=None, description="Project type: residential, commercial, etc.")
     location: Optional[str] = Field(default=None, description="Address or location")
@@ -48,12 +52,14 @@ class Project(BaseModel):
 
 class Vote(BaseModel):
     """Represents a vote on a bill"""
+    model_config = ConfigDict(extra="ignore", frozen=True)
     bill_id: str = Field(description="Bill identifier being voted on")
     person: str = Field(description="Name of person voting")
     vote: VoteValue = Field(description="Vote value")
 
 class TranscriptExtraction(BaseModel):
     """Complete extraction from a single transcript"""
+    model_config = ConfigDict(extra="ignore", frozen=True)
     bills: List[Bill] = Field(default_factory=list)
     people: List[Person] = Field(default_factory=list)
     organizations: List[Organization] = Field(default_factory=list)
@@ -1,9 +1,13 @@
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict
 from collections import defaultdict
-from difflib import SequenceMatcher
+
+import numpy as np
+import orjson
+from rapidfuzz import process, fuzz
 
 from src.config import EXTRACTIONS_DIR, OUTPUT_DIR
 from src.models import TranscriptExtraction
@@ -12,6 +16,10 @@ from src.models import TranscriptExtraction
 class EntityResolver:
     """Pure rule-based entity resolver producing alias→canonical dicts."""
 
+    # Compiled once; normalize_bill_id runs per bill mention across the corpus
+    _PREFIX_RE = re.compile(r'^(bill|ordinance|resolution)\s*', re.IGNORECASE)
+    _BILL_RE = re.compile(r'(\d{2})-?([OR])-?(\d+)')
+
     def __init__(self):
         self.common_abbreviations = {
             'dept': 'department',
@@ -27,31 +35,54 @@ class EntityResolver:
             'afd': 'atlanta fire department',
             'dot': 'department of transportation',
         }
+        self._normalize_memo = {}
 
-    @staticmethod
-    def normalize_bill_id(bill_id: str) -> str:
+    @classmethod
+    def normalize_bill_id(cls, bill_id: str) -> str:
         """Normalize bill IDs to standard format."""
-        bill_id = re.sub(r'^(bill|ordinance|resolution)\s*', '', bill_id, flags=re.IGNORECASE)
+        bill_id = cls._PREFIX_RE.sub('', bill_id)
         bill_id = bill_id.upper().strip()
-        match = re.match(r'(\d{2})-?([OR])-?(\d+)', bill_id)
+        match = cls._BILL_RE.match(bill_id)
         if match:
             return f"{match.group(1)}-{match.group(2)}-{match.group(3)}"
         return bill_id
 
     def normalize_text(self, text: str) -> str:
-        """Normalize text for fuzzy matching."""
-        text = text.lower().strip()
-        words = text.split()
-        return ' '.join(self.common_abbreviations.get(word, word) for word in words)
+        """Normalize text for fuzzy matching (memoized — the same entity
+        strings are normalized repeatedly during pairwise resolution)."""
+        normalized = self._normalize_memo.get(text)
+        if normalized is None:
+            lowered = text.lower().strip()
+            normalized = self._normalize_memo[text] = ' '.join(
+                self.common_abbreviations.get(word, word) for word in lowered.split()
+            )
+        return normalized
+
+    def fuzzy_match_score(self, s1: str, s2: str, threshold: float = 0.85) -> float:
+        """Calculate fuzzy matching score between two strings.
+
+        threshold is the caller's match cutoff; pairs provably unable to
+        reach it are scored 0.0 without running the edit-distance pass.
+        """
+        # Identical inputs need no normalization or matcher at all
+        if s1 is s2 or s1 == s2:
+            return 1.0
 
-    def fuzzy_match_score(self, s1: str, s2: str) -> float:
-        """Calculate fuzzy matching score between two strings."""
         s1_norm, s2_norm = self.normalize_text(s1), self.normalize_text(s2)
         if s1_norm == s2_norm:
             return 1.0
         if s1_norm in s2_norm or s2_norm in s1_norm:
             return 0.85
-        return SequenceMatcher(None, s1_norm, s2_norm).ratio()
+
+        # Indel similarity peaks at 2*min/(min+max), so a pair can only
+        # reach the threshold t when min/max >= t/(2-t); below that bound
+        # the edit-distance pass can be skipped without losing matches
+        if min(len(s1_norm), len(s2_norm)) / max(len(s1_norm), len(s2_norm), 1) < threshold / (2 - threshold):
+            return 0.0
+
+        # Same SIMD Levenshtein backend _cluster uses, instead of
+        # difflib's interpreted Ratcliff-Obershelp
+        return fuzz.ratio(s1_norm, s2_norm) / 100.0
 
     def resolve_bills(self, bills: List[str]) -> Dict[str, str]:
         """Resolve bills into alias→canonical dict."""
@@ -67,43 +98,102 @@ class EntityResolver:
                 lookup[form] = canonical
         return lookup
 
+    @staticmethod
+    def _cluster(entity_list: List[str], norms: List[str], cutoff: float) -> Dict[str, str]:
+        """Greedy alias→canonical clustering over a RapidFuzz similarity matrix.
+
+        cdist runs the pairwise comparison in C++ (SIMD Levenshtein,
+        multi-threaded) instead of a Python SequenceMatcher loop.
+        """
+        scores = process.cdist(norms, norms, scorer=fuzz.ratio,
+                               score_cutoff=cutoff, workers=-1, dtype=np.uint8)
+
+        lookup = {}
+        assigned = [False] * len(entity_list)
+        for i, entity in enumerate(entity_list):
+            if assigned[i]:
+                continue
+            lookup[entity] = entity
+            assigned[i] = True
+
+            for j in np.nonzero(scores[i] >= cutoff)[0]:
+                if not assigned[j]:
+                    lookup[entity_list[j]] = entity
+                    assigned[j] = True
+
+        return lookup
+
     def resolve_fuzzy(self, entities: List[str], threshold: float = 0.85) -> Dict[str, str]:
-        """Resolve organizations/projects with fuzzy matching into alias→canonical dict."""
-        processed = set()
+        """Resolve organizations/projects with fuzzy matching into alias→canonical dict.
+
+        Entities are blocked by the first characters of their normalized
+        first token so the quadratic comparison only runs within buckets;
+        a second pass over the bucket canonicals (a much smaller set)
+        merges aliases a bucket boundary happened to split.
+        """
         entity_list = sorted(set(entities))
-        lookup = {}
+        if not entity_list:
+            return {}
 
-        for i, entity1 in enumerate(entity_list):
-            if entity1 in processed:
-                continue
+        cutoff = threshold * 100
 
-            lookup[entity1] = entity1
-            processed.add(entity1)
+        # Normalize each entity once and block on its normalized prefix
+        buckets = defaultdict(list)
+        for entity in entity_list:
+            norm = self.normalize_text(entity)
+            key = norm.split()[0][:3] if norm else ''
+            buckets[key].append((entity, norm))
 
-            for j, entity2 in enumerate(entity_list):
-                if i != j and entity2 not in processed:
-                    if self.fuzzy_match_score(entity1, entity2) >= threshold:
-                        lookup[entity2] = entity1
-                        processed.add(entity2)
+        lookup = {}
+        for items in buckets.values():
+            bucket_entities = [e for e, _ in items]
+            bucket_norms = [n for _, n in items]
+            lookup.update(self._cluster(bucket_entities, bucket_norms, cutoff))
+
+        # Cross-bucket pass over representatives only
+        representatives = sorted(set(lookup.values()))
+        if len(representatives) > 1:
+            rep_norms = [self.normalize_text(r) for r in representatives]
+            rep_lookup = self._cluster(representatives, rep_norms, cutoff)
+            lookup = {alias: rep_lookup.get(canonical, canonical)
+                      for alias, canonical in lookup.items()}
 
         return lookup
 
-    def aggregate_entities(self) -> Dict[str, List[str]]:
-        """Load and aggregate all extracted entities."""
-        aggregated = defaultdict(list)
+    def aggregate_entities(self, validate: bool = False) -> Dict[str, List[str]]:
+        """Load and aggregate all extracted entities.
+
+        Files are read in parallel and parsed with orjson; only the three
+        name/id fields are plucked out, skipping full Pydantic object
+        construction. Pass validate=True to route through
+        TranscriptExtraction as a correctness check.
+        """
         extraction_files = list(EXTRACTIONS_DIR.glob("*.json"))
         print(f"📂 Loading {len(extraction_files)} extraction files...")
 
-        for file_path in extraction_files:
+        def _load(file_path: Path):
             try:
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                    extraction = TranscriptExtraction(**data)
-                    aggregated['organizations'].extend([o.name for o in extraction.organizations])
-                    aggregated['bills'].extend([b.id for b in extraction.bills])
-                    aggregated['projects'].extend([p.name for p in extraction.projects])
+                data = orjson.loads(file_path.read_bytes())
+                if validate:
+                    data = TranscriptExtraction.model_validate(data).model_dump()
+                return (
+                    [o['name'] for o in data.get('organizations', [])],
+                    [b['id'] for b in data.get('bills', [])],
+                    [p['name'] for p in data.get('projects', [])],
+                )
             except Exception as e:
                 print(f"⚠️  Error loading {file_path.name}: {e}")
+                return None
+
+        aggregated = defaultdict(list)
+        with ThreadPoolExecutor() as executor:
+            for result in executor.map(_load, extraction_files):
+                if result is None:
+                    continue
+                orgs, bills, projects = result
+                aggregated['organizations'].extend(orgs)
+                aggregated['bills'].extend(bills)
+                aggregated['projects'].extend(projects)
 
         # Remove exact duplicates
         for key in aggregated: